@@ -1,24 +1,47 @@
 import os
 import sys
 import asyncio
+import functools
+import heapq
+import html
 import logging
-from typing import List, Optional
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from datetime import date, time, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from dataclasses import dataclass, field
-from pytz import timezone
+from zoneinfo import ZoneInfo
 import caldav
+from caldav.elements import cdav, dav
+from caldav.elements.base import BaseElement, NamedBaseElement
+from caldav.lib.namespace import ns
+import requests
 import telegram
-from telegram.constants import ParseMode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from telegram.constants import MessageLimit, ParseMode
 
 DEFAULT_LOG_LEVEL = 'INFO'
+MAX_PARALLEL_CALENDAR_QUERIES = 4
+PARSE_PROCESSES = 2
+# Reminders due within this many seconds of each other are sent as a single message.
+REMINDER_BATCH_WINDOW_IN_SEC = 2
+# Properties requested from the server for each event. Everything else (descriptions, attendees,
+# attachments, ...) is left out of the response.
+EVENT_PROPERTIES = ['UID', 'SUMMARY', 'DTSTART', 'DTEND', 'DURATION', 'RRULE', 'RDATE', 'EXDATE', 'EXRULE', 'RECURRENCE-ID']
+ALARM_PROPERTIES = ['TRIGGER', 'ACTION']
+RECURRENCE_PROPERTIES = ['RRULE', 'RDATE', 'EXDATE', 'EXRULE']
+log = logging.getLogger(__name__)
 log_level = os.environ.get('LOG_LEVEL', DEFAULT_LOG_LEVEL)
 logging_mapping = logging.getLevelNamesMapping()
 if log_level in logging_mapping:
     logging.basicConfig(format='%(asctime)s - %(message)s', level=logging_mapping[log_level])
 else:
     logging.basicConfig(format='%(asctime)s - %(message)s', level=logging_mapping[DEFAULT_LOG_LEVEL])
-    logging.error(f'Invalid LogLevel: {log_level}')
+    log.error('Invalid LogLevel: %s', log_level)
 
 
 class Config:
@@ -30,30 +53,190 @@ class Config:
         self.CALDAV_USERNAME = os.environ.get('CALDAV_USERNAME', None)
         self.CALDAV_PASSWORD = os.environ.get('CALDAV_PASSWORD', None)
         self.CALENDAR_IDS = os.environ.get('CALENDAR_IDS', None)
-        self.SYNC_INTERVAL_IN_SEC = os.environ.get('SYNC_INTERVAL_IN_SEC', 1800)
-        self.FETCH_EVENT_WINDOW_IN_DAYS = os.environ.get('FETCH_EVENT_WINDOW_IN_DAYS', 5)
+        self.SYNC_INTERVAL_IN_SEC = self._get_positive_int('SYNC_INTERVAL_IN_SEC', 1800)
+        self.FETCH_EVENT_WINDOW_IN_DAYS = self._get_positive_int('FETCH_EVENT_WINDOW_IN_DAYS', 5)
         self.TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', None)
         self.TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', None)
-        self.TIMEZONE = timezone(os.environ.get('TIMEZONE', 'UTC'))
+        self.TIMEZONE = ZoneInfo(os.environ.get('TIMEZONE', 'UTC'))
 
-        self.CALENDAR_IDS = self.CALENDAR_IDS.split(";") if self.CALENDAR_IDS else None
+        self.CALENDAR_IDS = frozenset(self.CALENDAR_IDS.split(";")) if self.CALENDAR_IDS else None
+        self.FETCH_WINDOW = relativedelta(days=self.FETCH_EVENT_WINDOW_IN_DAYS)
+
+    @staticmethod
+    def _get_positive_int(name: str, default: int) -> int:
+        """Read a positive integer from the environment.
+        :param name: Name of the environment variable.
+        :param default: Value used if the variable is not set or invalid.
+        :return: The parsed value or the default.
+        """
+        value = os.environ.get(name, None)
+        if value is None:
+            return default
+
+        try:
+            result = int(value)
+        except ValueError:
+            result = 0
+
+        if result <= 0:
+            log.error('Invalid %s: %s', name, value)
+            return default
+        return result
+
+
+class CalendarDataProp(NamedBaseElement):
+    """CalDAV prop element, used to restrict the properties of a component in a calendar-data request."""
+    tag = ns('C', 'prop')
+
+
+class CalendarDataAllProp(BaseElement):
+    """CalDAV allprop element, used to request all properties of a component in a calendar-data request."""
+    tag = ns('C', 'allprop')
+
+
+class CalendarDataAllComp(BaseElement):
+    """CalDAV allcomp element, used to request all subcomponents of a component in a calendar-data request."""
+    tag = ns('C', 'allcomp')
 
 
-@dataclass(order=True)
+@dataclass(frozen=True, order=True)
 class Reminder:
     """Class representing a reminder."""
     dt: datetime
-    valarm: caldav.vobject.base.Component = field(compare = False)
-    vevent: caldav.vobject = field(compare = False)
+    uid: str = field(compare=False)
+    summary: str = field(compare=False)
+    dtstart: datetime = field(compare=False)
 
 
 @dataclass()
 class Event:
     """Class representing an event."""
-    vevent: caldav.vobject
+    uid: str
+    summary: str
+    dtstart: datetime
     reminders: List[Reminder] = field(default_factory=list, init=False)
 
 
+def _expand(obj: caldav.objects.Event, start: datetime, end: datetime) -> List[caldav.objects.Event]:
+    """Split a calendar object into its occurrences in the given range.
+    Recurring events are expanded client side.
+    :param obj: The calendar object to expand.
+    :param start: Start of the search range.
+    :param end: End of the search range.
+    :return: A list of calendar objects, one per occurrence.
+    """
+    component = obj.icalendar_component
+    if component is None:
+        return []
+
+    if any(key in component for key in RECURRENCE_PROPERTIES):
+        obj.expand_rrule(start, end)
+    return obj.split_expanded()
+
+
+def _build_event(vevent: caldav.vobject.base.Component, tz: ZoneInfo) -> Event:
+    """Normalize the start time of a vevent and collect its reminders.
+    :param vevent: The vevent component to process.
+    :param tz: The timezone to convert the start time and reminders to.
+    :return: The Event object including its reminders.
+    """
+    log.debug('Processing event: %s (id: %s, dtstart: %s)', vevent.summary.value, vevent.uid.value, vevent.dtstart.value)
+
+    dtstart = vevent.dtstart.value
+
+    if type(dtstart) == date:
+        dtstart = datetime.combine(dtstart, time(0, 0))
+        log.debug('All-Day Event. Start-Time added: %s', dtstart)
+
+    info = dtstart.tzinfo
+    if info is None or info.utcoffset(dtstart) is None:
+        dtstart = dtstart.replace(tzinfo=tz)
+        log.debug('Timezone added to dtstart: %s', dtstart)
+    elif info is not tz:
+        # Always convert to the configured timezone, the tzinfo objects created by vobject cannot be pickled.
+        dtstart = dtstart.astimezone(tz)
+
+    event = Event(uid=vevent.uid.value, summary=vevent.summary.value, dtstart=dtstart)
+
+    for valarm in vevent.components():
+        trigger = valarm.trigger.value
+        log.debug('Found reminder: %s (%s)', trigger, type(trigger))
+        if isinstance(trigger, timedelta):
+            alarm_dt = dtstart + trigger
+        else:
+            alarm_dt = trigger.astimezone(tz)
+        event.reminders.append(Reminder(dt=alarm_dt, uid=event.uid, summary=event.summary, dtstart=dtstart))
+
+    return event
+
+
+def _parse_ical(raw_ics: str, start: datetime, end: datetime, tz: ZoneInfo) -> Tuple[List[Event], bool]:
+    """Parse the iCalendar data of a calendar object into its events in the given range.
+    :param raw_ics: The iCalendar data.
+    :param start: Start of the search range.
+    :param end: End of the search range.
+    :param tz: The configured timezone.
+    :return: The Event objects, and whether they can be cached. Only single, non-recurring events
+        are cacheable, as the occurrences of recurring events depend on the search range.
+    """
+    occurrences = _expand(caldav.objects.Event(data=raw_ics), start, end)
+    vevents = [o.vobject_instance.vevent for o in occurrences]
+    cacheable = len(vevents) == 1 and 'recurrence-id' not in vevents[0].contents
+    return [_build_event(vevent, tz) for vevent in vevents], cacheable
+
+
+def _parse_batch(raw_list: List[str], start: datetime, end: datetime, tz: ZoneInfo) -> List[Tuple[List[Event], bool]]:
+    """Parse a batch of calendar objects. Runs in a worker process of the parser pool.
+    Calendar objects which cannot be parsed are logged and skipped.
+    :param raw_list: The iCalendar data of the calendar objects.
+    :param start: Start of the search range.
+    :param end: End of the search range.
+    :param tz: The configured timezone.
+    :return: The result of _parse_ical for each calendar object.
+    """
+    results: List[Tuple[List[Event], bool]] = []
+    for raw_ics in raw_list:
+        try:
+            results.append(_parse_ical(raw_ics, start, end, tz))
+        except Exception as e:
+            log.error('Cannot parse calendar object')
+            log.exception(e)
+            results.append(([], False))
+    return results
+
+
+class ThreadLocalSessionDAVClient(caldav.DAVClient):
+    """CalDAV client using a separate, pooled HTTP session for each thread.
+    requests.Session is not thread-safe, so the calendar queries running in parallel must not share one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the client. See caldav.DAVClient for the parameters."""
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def session(self) -> requests.Session:
+        """The HTTP session of the current thread."""
+        if not hasattr(self._local, 'session'):
+            self.session = requests.Session()
+        return self._local.session
+
+    @session.setter
+    def session(self, session: requests.Session):
+        # Keep the connections to the server alive between the requests and sync cycles,
+        # so the TCP and TLS handshakes are not repeated for every calendar query.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.3, allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'PROPFIND', 'REPORT'})
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        self._local.session = session
+
+
 class CaldavHandler:
     """Handler for interacting with CalDAV server."""
 
@@ -62,26 +245,38 @@ class CaldavHandler:
         self.principal = None
         self.dav_client = None
         self.config: Config = config
+        self._event_cache: Dict[str, Tuple[str, Event]] = {}
+        self._cal_by_url: Dict[str, caldav.objects.Calendar] = {}
+        self._caldav_exec = ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALENDAR_QUERIES, thread_name_prefix='caldav')
+        self._parse_exec = self._create_parse_exec()
+
+    @staticmethod
+    def _create_parse_exec() -> ProcessPoolExecutor:
+        """Create the process pool for parsing iCalendar data.
+        Parsing is pure Python and would block the event loop, so it runs in separate processes.
+        The processes are spawned instead of forked, as forking a multi-threaded process is unsafe.
+        """
+        return ProcessPoolExecutor(max_workers=PARSE_PROCESSES, mp_context=multiprocessing.get_context('spawn'))
 
     def login(self, caldav_url: str, username: str, password: str) -> bool:
         """Create CalDAV client and login to the server."""
-        logging.debug(f'Creating caldav client: {caldav_url=}, {username=}')
+        log.debug('Creating caldav client: caldav_url=%r, username=%r', caldav_url, username)
 
         # Initiating the client object will not cause any server communication,
         # so the credentials aren't validated.
-        self.dav_client = caldav.DAVClient(
+        self.dav_client = ThreadLocalSessionDAVClient(
             url=caldav_url,
             username=username,
             password=password
         )
 
         # This will cause communication with the server.
-        logging.debug('Fetching principal object')
+        log.debug('Fetching principal object')
         try:
             self.principal = self.dav_client.principal()
             return True
         except caldav.lib.error.AuthorizationError as e:
-            logging.warning(f'{e}')
+            log.warning('%s', e)
             return False
 
     def fetch_calendars(self) -> Optional[List[caldav.objects.Calendar]]:
@@ -89,78 +284,197 @@ class CaldavHandler:
         :return: A list of calendars or None if not logged in.
         """
         if self.principal is None:
-            logging.error('Cannot fetch calendars: Not logged in')
+            log.error('Cannot fetch calendars: Not logged in')
             return None
 
-        logging.debug('Fetching calendars')
+        log.debug('Fetching calendars')
         calendars = self.principal.calendars()
 
-        if logging.getLogger().level == logging.DEBUG:
+        if log.isEnabledFor(logging.DEBUG):
             logged_calendar = ''
             for calendar in calendars:
                 logged_calendar += f'\t{calendar.name} ({calendar.id}): {calendar.url}\n'
 
-            logging.debug(f'Fetched calendars:\n{logged_calendar}')
+            log.debug('Fetched calendars:\n%s', logged_calendar)
 
         return calendars
 
-    def fetch_events(self, calendars: List[caldav.objects.Calendar]) -> List[Event]:
+    @staticmethod
+    def _time_range_filter(start: datetime, end: datetime) -> cdav.Filter:
+        """Build the filter matching all events in the given range.
+        :param start: Start of the search range.
+        :param end: End of the search range.
+        :return: The filter element.
+        """
+        return cdav.Filter() + (cdav.CompFilter('VCALENDAR') + (cdav.CompFilter('VEVENT') + cdav.TimeRange(start, end)))
+
+    @staticmethod
+    def _build_etag_query(start: datetime, end: datetime) -> cdav.CalendarQuery:
+        """Build the calendar-query returning only the ETags of all events in the given range.
+        :param start: Start of the search range.
+        :param end: End of the search range.
+        :return: The calendar-query element.
+        """
+        prop = dav.Prop() + dav.GetEtag()
+        return cdav.CalendarQuery() + [prop, CaldavHandler._time_range_filter(start, end)]
+
+    @staticmethod
+    def _build_multiget_query(hrefs: List[str]) -> cdav.CalendarMultiGet:
+        """Build the calendar-multiget for the given events.
+        Only the properties needed for the reminders are requested, plus the ETag of each resource.
+        Recurring events are not expanded by the server, as some servers then drop the
+        non-recurring ones from the response.
+        :param hrefs: The hrefs of the events to fetch.
+        :return: The calendar-multiget element.
+        """
+        valarm = cdav.Comp('VALARM') + [CalendarDataProp(name) for name in ALARM_PROPERTIES]
+        vevent = cdav.Comp('VEVENT') + [CalendarDataProp(name) for name in EVENT_PROPERTIES] + valarm
+        vtimezone = cdav.Comp('VTIMEZONE') + [CalendarDataAllProp(), CalendarDataAllComp()]
+        vcalendar = cdav.Comp('VCALENDAR') + [CalendarDataProp('VERSION'), CalendarDataProp('PRODID'), vevent, vtimezone]
+        data = cdav.CalendarData() + vcalendar
+
+        prop = dav.Prop() + [dav.GetEtag(), data]
+        return cdav.CalendarMultiGet() + prop + [dav.Href(value=href) for href in hrefs]
+
+    def _report(self, calendar: caldav.objects.Calendar, query: BaseElement, props: List[BaseElement]) -> Dict[str, Dict]:
+        """Send a REPORT request for a calendar (blocking).
+        :param calendar: The calendar to query.
+        :param query: The report query.
+        :param props: The properties to extract from the response.
+        :return: A dict mapping each href to its properties, without an entry for the calendar itself.
+        """
+        response = self.dav_client.report(calendar.url, str(query), depth=1)
+        if response.status >= 400:
+            raise caldav.lib.error.ReportError(f'{response.status} {response.reason}')
+
+        results = response.expand_simple_props(props)
+        return {href: result for href, result in results.items() if calendar.url.join(href) != calendar.url}
+
+    def _search_one(self, item: caldav.objects.Calendar, start: datetime, end: datetime) \
+            -> Tuple[Dict[str, Tuple[str, Event]], Dict[str, Tuple[Optional[str], str]]]:
+        """Search a single calendar for events in the given range (blocking).
+        First only the ETags of the events are queried. Events with an unchanged ETag are taken
+        from the event cache, only the new or modified ones are fetched.
+        :param item: Calendar object to search.
+        :param start: Start of the search range.
+        :param end: End of the search range.
+        :return: The cache entries of the unchanged events, and the ETag and iCalendar data of the changed ones by href.
+        """
+        calendar = self._cal_by_url.get(str(item.url))
+        if calendar is None:
+            calendar = self._cal_by_url[str(item.url)] = self.dav_client.calendar(url=item.url)
+        log.debug('Searching for events in %s. Range: [%s, %s]', item.id, start, end)
+
+        etags = self._report(calendar, self._build_etag_query(start, end), [dav.GetEtag()])
+
+        unchanged: Dict[str, Tuple[str, Event]] = {}
+        changed: List[str] = []
+        for href, props in etags.items():
+            etag = props.get(dav.GetEtag.tag)
+            cached = self._event_cache.get(href)
+            if etag is not None and cached is not None and cached[0] == etag:
+                log.debug('Event unchanged: %s (etag: %s)', href, etag)
+                unchanged[href] = cached
+            else:
+                changed.append(href)
+
+        if not changed:
+            return unchanged, {}
+
+        log.debug('Fetching changed events: %s', changed)
+        objects = self._report(calendar, self._build_multiget_query(changed), [dav.GetEtag(), cdav.CalendarData()])
+        changed_objects = {
+            href: (props.get(dav.GetEtag.tag), props[cdav.CalendarData.tag])
+            for href, props in objects.items() if props.get(cdav.CalendarData.tag)
+        }
+        return unchanged, changed_objects
+
+    async def _parse(self, raw_list: List[str], start: datetime, end: datetime) -> List[Tuple[List[Event], bool]]:
+        """Parse calendar objects, split into one batch per process of the parser pool.
+        :param raw_list: The iCalendar data of the calendar objects.
+        :param start: Start of the search range.
+        :param end: End of the search range.
+        :return: The result of _parse_ical for each calendar object.
+        """
+        loop = asyncio.get_running_loop()
+        size = -(-len(raw_list) // PARSE_PROCESSES)
+        try:
+            tasks = [
+                loop.run_in_executor(self._parse_exec, _parse_batch, raw_list[i:i + size], start, end, self.config.TIMEZONE)
+                for i in range(0, len(raw_list), size)
+            ]
+            batches = await asyncio.gather(*tasks)
+        except BrokenProcessPool:
+            # A broken pool cannot be used anymore, replace it for the next sync. The pool also breaks if a worker
+            # dies while idle, then already submitting fails.
+            self._parse_exec = self._create_parse_exec()
+            raise
+        return [result for batch in batches for result in batch]
+
+    def _merge_results(self, calendars: List[caldav.Calendar], results: list) \
+            -> Tuple[Dict[str, Tuple[str, Event]], Dict[str, Tuple[Optional[str], str]]]:
+        """Merge the per calendar search results.
+        A partial result would drop the pending reminders of the failed calendars, so if any calendar failed, the
+        first error is raised after logging all of them and the previous state is kept.
+        :param calendars: The searched calendars.
+        :param results: The results of _search_one for each calendar, or the raised exception.
+        :return: The unchanged cache entries and the changed objects of all calendars.
+        """
+        event_cache: Dict[str, Tuple[str, Event]] = {}
+        changed: Dict[str, Tuple[Optional[str], str]] = {}
+        error: Optional[BaseException] = None
+        for item, result in zip(calendars, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, caldav.lib.error.AuthorizationError):
+                    self._cal_by_url.pop(str(item.url), None)
+                # The first error is raised and logged by the caller, so only log the traceback of the others.
+                log.error('Cannot fetch events of calendar %s', item.id, exc_info=result if error else None)
+                error = error or result
+                continue
+
+            unchanged, changed_objects = result
+            event_cache.update(unchanged)
+            changed.update(changed_objects)
+
+        if error is not None:
+            raise error
+        return event_cache, changed
+
+    async def fetch_events(self, calendars: List[caldav.objects.Calendar]) -> List[Event]:
         """Fetch the events from the specified calendars.
+        The calendars are queried concurrently on the CalDAV thread pool, changed events are parsed on the parser pool.
         :param calendars: List of Calendar objects to fetch events from.
         :return: A list of Event objects.
         """
-        logging.debug(f'Fetching events for {[cal.id for cal in calendars]}')
-        eventsData: List[Event] = []
-        for item in calendars:
-            calendar = self.dav_client.calendar(url=item.url)
-            start = datetime.now(tz=self.config.TIMEZONE)
-            end = datetime.now(tz=self.config.TIMEZONE) + \
-                relativedelta(days=int(self.config.FETCH_EVENT_WINDOW_IN_DAYS))
-            logging.debug(f'Searching for events. Range: [{str(start)}, {str(end)}]')
-
-            events = calendar.search(
-                event=True,
-                expand=True,
-                start=start,
-                end=end,
-            )
-
-            for event in events:
-                vevent = event.vobject_instance.vevent
-                logging.debug(f'Processing event: {vevent.summary.value} (id: {vevent.uid.value}, dtstart: {vevent.dtstart.value})')
-
-                dtstart = vevent.dtstart.value
-
-                if type(dtstart) == date:
-                    dtstart = datetime.combine(dtstart, time(0, 0))
-                    logging.debug(f'All-Day Event. Start-Time added: {dtstart}')
-
-                if (dtstart.tzinfo is None or dtstart.tzinfo.utcoffset(dtstart) is None):
-                    dtstart = self.config.TIMEZONE.localize(dtstart)
-                    logging.debug(f'Timezone added to dtstart: {dtstart}')
-
-                vevent.dtstart.value = dtstart.astimezone(self.config.TIMEZONE)
-                dtstart = vevent.dtstart.value
-                event = Event(vevent=vevent)
-
-                for valarm in vevent.components():
-                    trigger = valarm.trigger.value
-                    logging.debug(f'Found reminder: {trigger} ({type(trigger)})')
-                    if isinstance(trigger, timedelta):
-                        alarm_dt = dtstart + trigger
-                    else:
-                        alarm_dt = trigger
-                    event.reminders.append(Reminder(dt=alarm_dt, valarm=valarm, vevent=vevent))
-
-                eventsData.append(event)
-
-        if logging.getLogger().level == logging.DEBUG:
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('Fetching events for %s', [cal.id for cal in calendars])
+        start = datetime.now(tz=self.config.TIMEZONE)
+        end = start + self.config.FETCH_WINDOW
+        loop = asyncio.get_running_loop()
+        tasks = [
+            loop.run_in_executor(self._caldav_exec, functools.partial(self._search_one, item, start, end))
+            for item in calendars
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        event_cache, changed = self._merge_results(calendars, results)
+
+        eventsData: List[Event] = [event for _, event in event_cache.values()]
+        if changed:
+            hrefs = list(changed)
+            parsed = await self._parse([changed[href][1] for href in hrefs], start, end)
+            for href, (events, cacheable) in zip(hrefs, parsed):
+                eventsData.extend(events)
+                etag = changed[href][0]
+                if etag is not None and cacheable:
+                    event_cache[href] = (etag, events[0])
+        self._event_cache = event_cache
+
+        if log.isEnabledFor(logging.DEBUG):
             logged_events = ''
             for event in eventsData:
-                logged_events += \
-                    f'\t{event.vevent.summary.value} ({event.vevent.uid.value}): {event.vevent.dtstart.value}\n'
+                logged_events += f'\t{event.summary} ({event.uid}): {event.dtstart}\n'
 
-            logging.debug(f'Fetched events({len(eventsData)}):\n{logged_events}')
+            log.debug('Fetched events(%d):\n%s', len(eventsData), logged_events)
         return eventsData
 
     def extract_reminders(self, events: List[Event]) -> List[Reminder]:
@@ -168,20 +482,17 @@ class CaldavHandler:
         :param events: List of Event objects to extract reminders from.
         :return: A list of Reminder objects.
         """
-        logging.debug(f'Extracting Reminders from events: {[event.vevent.uid.value for event in events]}')
-        reminders: List[Reminder] = []
-        for event in events:
-            for reminder in event.reminders:
-                if reminder.dt >= datetime.now(tz=self.config.TIMEZONE):
-                    reminders.append(reminder)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('Extracting Reminders from events: %s', [event.uid for event in events])
+        now = datetime.now(tz=self.config.TIMEZONE)
+        reminders: List[Reminder] = [reminder for event in events for reminder in event.reminders if reminder.dt >= now]
 
-        reminders.sort()
-        if logging.getLogger().level == logging.DEBUG:
+        if log.isEnabledFor(logging.DEBUG):
             logged_events = ''
             for reminder in reminders:
-                logged_events += f'\t{reminder.vevent.summary.value}: {reminder.dt}\n'
+                logged_events += f'\t{reminder.summary}: {reminder.dt}\n'
 
-            logging.debug(f'Extracted reminders:\n{logged_events}')
+            log.debug('Extracted reminders:\n%s', logged_events)
         return reminders
 
 
@@ -190,87 +501,139 @@ class Worker:
 
     def __init__(self, config: Config, calHandler: CaldavHandler):
         """Initialize Worker instance with CaldavHandler."""
-        self.sorted_reminders: List[Reminder] = []
+        # Pending reminders as a heap of (deadline, sequence number, reminder).
+        self._heap: List[Tuple[float, int, Reminder]] = []
+        # (uid, timestamp) of every pending reminder, to detect changes without comparing the Reminder objects.
+        self._fingerprint: FrozenSet[Tuple[str, float]] = frozenset()
+        # Deadline up to which all reminders have been sent, as reminders are sent up to the batch window early.
+        self._sent_until: float = 0.0
         self.reminder_task: asyncio.Task = None
         self.calHandler: CaldavHandler = calHandler
         self.config: Config = config
-        self.next_sync_dt = datetime.now(tz=self.config.TIMEZONE)
         self.cals: List[caldav.objects.Calendar] = None
         self.event_loop = asyncio.new_event_loop()
+        self.bot = telegram.Bot(token=self.config.TELEGRAM_BOT_TOKEN)
 
-    async def run_at(self, dt, coro):
-        """Run the specified coroutine at the specified datetime."""
+    async def run_at(self, deadline: float, coro):
+        """Run the specified coroutine at the specified event loop time."""
         try:
-            now = datetime.now(tz=self.config.TIMEZONE)
-            await asyncio.sleep((dt - now).total_seconds())
+            await asyncio.sleep(deadline - asyncio.get_running_loop().time())
             return await coro()
         except asyncio.CancelledError:
             pass
 
     def run(self):
         """Run the main event loop for synchronization and reminder processing."""
-        self.event_loop.create_task(self.sync())
-        self.event_loop.run_forever()
+        self.event_loop.run_until_complete(self.bot.initialize())
+        self.event_loop.create_task(self._periodic_sync())
+        try:
+            self.event_loop.run_forever()
+        finally:
+            self.event_loop.run_until_complete(self.bot.shutdown())
+
+    async def _periodic_sync(self):
+        """Synchronize every SYNC_INTERVAL_IN_SEC seconds, measured from the start of each sync."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            try:
+                await self.sync()
+            except Exception as e:
+                log.error('Exception occured')
+                log.exception(e)
+
+            await asyncio.sleep(max(0, self.config.SYNC_INTERVAL_IN_SEC - (loop.time() - start)))
 
     def scheduleReminderTask(self):
-        """Schedule the next reminder task based on the sorted reminders list."""
+        """Schedule the next reminder task based on the pending reminders heap."""
         if self.reminder_task:
             self.reminder_task.cancel()
 
-        if len(self.sorted_reminders) > 0:
-            self.reminder_task = self.event_loop.create_task(self.run_at(self.sorted_reminders[0].dt, self.process_reminders))
+        if len(self._heap) > 0:
+            self.reminder_task = self.event_loop.create_task(
+                self.run_at(self._heap[0][0], self.process_reminders))
+
+    def get_deadlines(self, reminders: List[Reminder]) -> List[float]:
+        """Convert the datetimes of the reminders to deadlines on the monotonic clock of the event loop."""
+        now = datetime.now(tz=self.config.TIMEZONE)
+        loop_now = self.event_loop.time()
+        return [loop_now + (reminder.dt - now).total_seconds() for reminder in reminders]
 
     async def sync(self) -> None:
         """Synchronize calendars and reminders with the server."""
-        logging.info('Syncing...')
-        try:
+        log.info('Syncing...')
+        if self.cals is None:
+            self.cals = self.calHandler.fetch_calendars()
             if self.cals is None:
-                self.cals = self.calHandler.fetch_calendars()
-                if self.cals is None:
-                    logging.error('Cannot sync calendar')
-                    return
-
-            cals_subscripted = list(filter(lambda x: x.id in self.config.CALENDAR_IDS, self.cals))
-            events = self.calHandler.fetch_events(cals_subscripted)
-            if events:
-                sorted_reminders_new = self.calHandler.extract_reminders(events)
-                if sorted_reminders_new != self.sorted_reminders:
-                    self.sorted_reminders = sorted_reminders_new
-                    self.scheduleReminderTask()
-
-        except Exception as e:
-            logging.error(f'Exception occured')
-            logging.exception(e)
-        finally:
-            next_sync_dt = datetime.now(tz=self.config.TIMEZONE) + \
-                relativedelta(seconds=int(self.config.SYNC_INTERVAL_IN_SEC))
-
-            loop = asyncio.get_event_loop()
-            loop.create_task(self.run_at(next_sync_dt, self.sync))
+                log.error('Cannot sync calendar')
+                return
+
+        cals_subscripted = [cal for cal in self.cals if cal.id in self.config.CALENDAR_IDS]
+        events = await self.calHandler.fetch_events(cals_subscripted)
+        if events:
+            reminders_new = self.calHandler.extract_reminders(events)
+            fingerprint = frozenset((reminder.uid, reminder.dt.timestamp()) for reminder in reminders_new)
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                deadlines = self.get_deadlines(reminders_new)
+                self._heap = [
+                    (deadline, i, reminder) for i, (deadline, reminder) in enumerate(zip(deadlines, reminders_new))
+                    if deadline > self._sent_until
+                ]
+                heapq.heapify(self._heap)
+                self.scheduleReminderTask()
 
     async def process_reminders(self):
         """Process reminders and send notifications."""
         self.reminder_task = None
         try:
-            logging.debug('Processing reminders')
-            while await self.process_next_reminder():
-                pass
-            self.scheduleReminderTask()
+            log.debug('Processing reminders')
+            reminders = self.pop_due_reminders()
+            if reminders:
+                await self.send_reminders(reminders)
         except asyncio.CancelledError:
-            logging.debug('cancel processing reminders')
+            log.debug('cancel processing reminders')
             pass
+        finally:
+            if self.reminder_task is None:
+                self.scheduleReminderTask()
 
-    async def process_next_reminder(self):
-        """Process the next reminder in the sorted reminders list."""
-        if len(self.sorted_reminders) > 0:
-            reminder = self.sorted_reminders.pop(0)
-            if reminder.dt <= datetime.now(tz=self.config.TIMEZONE):
-                logging.info(f'Sending reminder for {reminder.vevent.summary.value}')
-                bot = telegram.Bot(self.config.TELEGRAM_BOT_TOKEN)
-                await bot.send_message(text=f'<b>{reminder.vevent.summary.value}</b>\r\n{reminder.vevent.dtstart.value.strftime("%d.%m.%Y %H:%M:%S")}',
-                                       chat_id=self.config.TELEGRAM_CHAT_ID, parse_mode=ParseMode.HTML)
-                return True
-        return False
+    def pop_due_reminders(self) -> List[Reminder]:
+        """Remove all reminders due within the batch window from the pending reminders heap.
+        :return: The due reminders, in order.
+        """
+        batch_deadline = self.event_loop.time() + REMINDER_BATCH_WINDOW_IN_SEC
+        reminders: List[Reminder] = []
+        while len(self._heap) > 0 and self._heap[0][0] <= batch_deadline:
+            _, _, reminder = heapq.heappop(self._heap)
+            reminders.append(reminder)
+        self._sent_until = batch_deadline
+        return reminders
+
+    async def send_reminders(self, reminders: List[Reminder]):
+        """Send the reminders, combined into as few messages as the Telegram message length allows.
+        :param reminders: The reminders to send.
+        """
+        separator = '\r\n\r\n'
+        message = ''
+        for reminder in reminders:
+            log.info('Sending reminder for %s', reminder.summary)
+            text = f'<b>{html.escape(reminder.summary)}</b>\r\n{reminder.dtstart.strftime("%d.%m.%Y %H:%M:%S")}'
+            if message and len(message) + len(separator) + len(text) > MessageLimit.MAX_TEXT_LENGTH:
+                await self.send_message(message)
+                message = ''
+            message = message + separator + text if message else text
+
+        await self.send_message(message)
+
+    async def send_message(self, message: str):
+        """Send a message to the configured chat. A failed message is logged, so it does not prevent sending the rest.
+        :param message: The HTML formatted message.
+        """
+        try:
+            await self.bot.send_message(text=message, chat_id=self.config.TELEGRAM_CHAT_ID, parse_mode=ParseMode.HTML)
+        except telegram.error.TelegramError:
+            log.exception('Cannot send reminder message')
 
 
 if __name__ == '__main__':
@@ -278,21 +641,21 @@ if __name__ == '__main__':
     config = Config()
 
     if config.CALDAV_URL is None:
-        logging.error('Cannot start. CALDAV_URL not set.')
+        log.error('Cannot start. CALDAV_URL not set.')
         sys.exit(1)
 
     if config.CALDAV_USERNAME is None or config.CALDAV_PASSWORD is None:
-        logging.error('Cannot start. CALDAV_USERNAME or CALDAV_PASSWORD not set.')
+        log.error('Cannot start. CALDAV_USERNAME or CALDAV_PASSWORD not set.')
         sys.exit(1)
 
     if config.TELEGRAM_BOT_TOKEN is None or config.TELEGRAM_CHAT_ID is None:
-        logging.error('Cannot start. TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID not set.')
+        log.error('Cannot start. TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID not set.')
         sys.exit(1)
 
     caldav_handler = CaldavHandler(config)
     result = caldav_handler.login(caldav_url=config.CALDAV_URL, username=config.CALDAV_USERNAME, password=config.CALDAV_PASSWORD)
     if result is False:
-        logging.error('Cannot start: Login failed')
+        log.error('Cannot start: Login failed')
         sys.exit(1)
     worker = Worker(config, caldav_handler)
     worker.run()